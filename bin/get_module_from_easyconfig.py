@@ -12,19 +12,35 @@
 #
 ##
 """
-Helper script to extract the full module name from an easyconfig
+Helper script to extract the full module name from one or more easyconfigs
+Usage: get_module_from_easyconfig.py [EasyBuild options] easyconfig [easyconfig ...]
+EasyBuild options, such as --include-easyblocks and --robot-paths, configure the parse of easyconfigs
 
 @author: Samuel Moors (Vrije Universiteit Brussel)
 """
 
-from easybuild.framework.easyconfig.tools import parse_easyconfigs
-from easybuild.tools.options import set_up_configuration
-
+import os
 import sys
 
-easyconfig = sys.argv[1]
+from build_tools.eccache import get_ecs_metadata
+
+eb_args = [arg for arg in sys.argv[1:] if arg.startswith('-')]
+easyconfigs = [arg for arg in sys.argv[1:] if not arg.startswith('-')]
 
-set_up_configuration()
+# silence EasyBuild while parsing, at file descriptor level to also catch output of external libraries
+devnull_fd = os.open(os.devnull, os.O_WRONLY)
+saved_fds = [os.dup(1), os.dup(2)]
+os.dup2(devnull_fd, 1)
+os.dup2(devnull_fd, 2)
+try:
+    ecs_metadata = get_ecs_metadata(easyconfigs, eb_args=eb_args)
+finally:
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.dup2(saved_fds[0], 1)
+    os.dup2(saved_fds[1], 2)
+    for fd in [devnull_fd, *saved_fds]:
+        os.close(fd)
 
-easyconfigs, generated_ecs = parse_easyconfigs([(easyconfig, False)])
-print(easyconfigs[0]['full_mod_name'])  # the output contains logging stuff from EB as well
+# one module name per line in the same order as the easyconfigs
+sys.stdout.writelines(f"{ec_metadata['full_mod_name']}\n" for ec_metadata in ecs_metadata)
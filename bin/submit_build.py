@@ -14,25 +14,37 @@
 """
 Script to submit easyconfig as jobs to all different architectures.
 
+EasyBuild options of each build job are kept as a list of arguments,
+which is quoted for the shell when the job script is written.
+
 @author: Ward Poelmans (Vrije Universiteit Brussel)
 @author: Samuel Moors (Vrije Universiteit Brussel)
 @author: Alex Domingo (Vrije Universiteit Brussel)
 """
 
+import importlib.util
 import os
 import re
+import shlex
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from build_tools.package import VERSION
+
+# print version before loading any heavy modules
+if __name__ == '__main__' and '--version' in sys.argv[1:]:
+    print(f"{os.path.basename(sys.argv[0])} {VERSION}")
+    sys.exit(0)
 
-from vsc.utils import fancylogger
-from vsc.utils.script_tools import SimpleOption
-from vsc.utils.run import RunNoShell
+from vsc.utils import fancylogger  # noqa: E402
+from vsc.utils.script_tools import SimpleOption  # noqa: E402
+from vsc.utils.run import RunNoShell  # noqa: E402
 
-from build_tools import hooks_hydra
-from build_tools.bwraptools import bwrap_prefix, rsync_copy
-from build_tools.clusters import ARCHS, PARTITIONS
-from build_tools.filetools import APPS_BRUSSEL, get_module
-from build_tools.lmodtools import submit_lmod_cache_job
-from build_tools.softinstall import mk_job_name, set_toolchain_generation, submit_build_job
+from build_tools.bwraptools import bwrap_prefix, rsync_copy  # noqa: E402
+from build_tools.clusters import ARCHS, DEFAULT_ARCHS, PARTITIONS  # noqa: E402
+from build_tools.filetools import APPS_BRUSSEL, get_module  # noqa: E402
+from build_tools.lmodtools import submit_lmod_cache_job  # noqa: E402
+from build_tools.softinstall import mk_job_name, set_toolchain_generation, submit_build_job  # noqa: E402
 
 # repositories with easyconfigs
 VSCSOFTSTACK_ROOT = os.path.expanduser("~/vsc-software-stack")
@@ -43,12 +55,25 @@ EASYCONFIG_REPOS = [
     "easybuild",  # main EasyBuild repo (https://github.com/easybuilders/easybuild-easyconfigs)
 ]
 EASYBLOCK_REPO = os.path.join("site-vub", "easyblocks", "*", "*.py")
+ROBOT_PATHS = ":".join([os.path.join(VSCSOFTSTACK_ROOT, repo) for repo in EASYCONFIG_REPOS])
+INCLUDE_EASYBLOCKS = os.path.join(VSCSOFTSTACK_ROOT, EASYBLOCK_REPO)
+
+# path to our EasyBuild hooks, found without importing them as they load EasyBuild
+HOOKS_HYDRA = importlib.util.find_spec('build_tools.hooks_hydra').origin
+
+# EasyBuild options common to all build jobs
+COMMON_EB_OPTIONS = ('--robot', '--logtostdout', '--debug', '--module-extensions', '--zip-logs=bzip2')
+
+# maximum number of concurrent job submissions to Slurm
+MAX_SUBMIT_WORKERS = 8
+
+# summary lines in the output of EasyBuild
+BUILD_OK_REGEX = re.compile(r'Build succeeded.*')
 
 logger = fancylogger.getLogger()
 fancylogger.logToScreen(True)
 fancylogger.setLogLevelInfo()
 
-DEFAULT_ARCHS = [arch for (arch, prop) in ARCHS.items() if prop['default']]
 LOCAL_ARCH = os.getenv('VSC_ARCH_LOCAL', '') + os.getenv('VSC_ARCH_SUFFIX', '')
 if LOCAL_ARCH not in ARCHS:
     logger.error("Local system has unsupported architeture: '%s'", LOCAL_ARCH)
@@ -74,13 +99,13 @@ def main():
     # start using environment from local machine, job scripts get custom paths
     ebconf = {
         'accept-eula-for': 'Intel-oneAPI,CUDA',
-        'robot-paths': ":".join([os.path.join(VSCSOFTSTACK_ROOT, repo) for repo in EASYCONFIG_REPOS]),
-        'include-easyblocks': os.path.join(VSCSOFTSTACK_ROOT, EASYBLOCK_REPO),
+        'robot-paths': ROBOT_PATHS,
+        'include-easyblocks': INCLUDE_EASYBLOCKS,
         'sourcepath': '/apps/brussel/sources:/apps/gent/source',
         'installpath': os.path.join(APPS_BRUSSEL, os.getenv('VSC_OS_LOCAL'), LOCAL_ARCH),
         'buildpath': os.path.join(job['tmp'], 'eb-submit-build-fetch'),
         'subdir-modules': 'modules',
-        'hooks': hooks_hydra.__file__,
+        'hooks': HOOKS_HYDRA,
     }
 
     # Parse command line arguments
@@ -104,6 +129,7 @@ def main():
         "bwrap": ("Reinstall via new namespace with bwrap", None, "store_true", False, 'b'),
         "skip-lmod-cache": ("Do not run Lmod cache after installation", None, "store_true", False, 's'),
         "lmod-cache-only": ("Run Lmod cache and exit, no software installation", None, "store_true", False, 'o'),
+        "version": ("Show version of build_tools and exit", None, "store_true", False),
     }
     opts = SimpleOption(options)
 
@@ -153,8 +179,8 @@ def main():
         # in case of builds for GPUs, the build host might change down the line if suitable GPU partitions exist
         build_hosts = [(arch, ARCHS[arch]['partition']['cpu']) for arch in arch_stack]
 
-    # remove duplicates and clean-up list of build hosts
-    build_hosts = {(arch, part) for (arch, part) in build_hosts if arch and part}
+    # remove duplicates and clean-up list of build hosts, keeping their order
+    build_hosts = list(dict.fromkeys((arch, part) for (arch, part) in build_hosts if arch and part))
 
     logger.debug("Initial target build hosts: %s", ', '.join([f'{p} ({a})' for (a, p) in build_hosts]))
 
@@ -185,6 +211,24 @@ def main():
     if opts.options.pwd_robot_append:
         ebconf['robot-paths'] += ':' + os.getcwd()
 
+    # EasyBuild options to parse easyconfigs in the same way as the build jobs
+    parse_eb_options = [f'--{opt}={ebconf[opt]}' for opt in ['include-easyblocks', 'robot-paths']]
+
+    # get module name of easyconfig files once for all build jobs
+    # easyconfigs found through the robot paths are only resolved to reinstall in a new namespace
+    bwrap = opts.options.bwrap
+    mod_name = None
+    if bwrap or os.path.isfile(easyconfig):
+        ec, module = get_module(easyconfig, eb_options=parse_eb_options)
+        if ec == 0:
+            mod_name = '/'.join(module)
+            logger.debug("Full module name of %s: %s", easyconfig, mod_name)
+        elif bwrap:
+            logger.error("Failed to get module name/version for %s", easyconfig)
+            sys.exit(1)
+        else:
+            logger.warning("Failed to get module name of %s, using its file name as job name", easyconfig)
+
     # Add extra footer
     if opts.options.extra_mod_footer:
         # if explicitly requested
@@ -198,7 +242,7 @@ def main():
         # fetch sources before submitting build jobs
         fetch_opts = ['--stop=fetch', '--robot', '--ignore-locks']
         if opts.options.extra_flags:
-            fetch_opts.append(opts.options.extra_flags)
+            fetch_opts.extend(shlex.split(opts.options.extra_flags))
         for opt, path in ebconf.items():
             # exclude --hooks and empty options from the fetch command
             if opt not in ['hooks'] and path is not None:
@@ -206,7 +250,8 @@ def main():
         if dry_run:
             fetch_opts.append('-x')  # extended dry-run
 
-        fetch_cmd = f'eb {" ".join(fetch_opts)} {easyconfig}'
+        # pass arguments as a list to execute eb without re-splitting the command
+        fetch_cmd = ['eb', *fetch_opts, *opts.args]
 
         logger.info("Fetching missing sources for %s and its dependencies...", easyconfig)
         ec, out = RunNoShell.run(fetch_cmd)
@@ -214,28 +259,33 @@ def main():
         if dry_run:
             logger.debug(out)
         elif ec == 0:
-            out_msg = re.findall('Build succeeded.*', out)
-            out_msg = "\n".join(out_msg).replace('Build succeeded', 'Sources are ready')
+            out_msg = "\n".join(BUILD_OK_REGEX.findall(out)).replace('Build succeeded', 'Sources are ready')
             logger.info(out_msg)
         else:
             logger.error("Failed to fetch sources for %s: %s", easyconfig, out)
             sys.exit(1)
 
-    bwrap = opts.options.bwrap
     if bwrap:
         logger.info('Reinstalling in 2 steps via new namespace under %s/bwrap', APPS_BRUSSEL)
-        ec, module = get_module(easyconfig)
-        if ec != 0:
-            logger.error("Failed to get module name/version for %s", easyconfig)
-            sys.exit(1)
 
     if opts.options.skip_lmod_cache:
         job['lmod_cache'] = ''
         logger.info("Not running Lmod cache after installation")
 
-    # ---> main build + lmod cache loop <--- #
-    # submit build jobs for each micro-architecture
+    # EB options with paths common to all build jobs
+    ebconf_options = [f'--{opt}={path}' for opt, path in ebconf.items() if opt not in ['buildpath', 'installpath']]
+    extra_eb_options = shlex.split(opts.options.extra_flags) if opts.options.extra_flags else []
+
+    # builds for GPUs are moved to the GPU partition of their arch, if it has any
+    build_plan = []
     for (host_arch, host_partition) in build_hosts:
+        gpu_partition = ARCHS[host_arch]['partition']['gpu'] if opts.options.gpu else None
+        build_plan.append((host_arch, host_partition, gpu_partition or host_partition, 1 if gpu_partition else 0))
+
+    # ---> main build + lmod cache loop <--- #
+    # prepare build jobs for each micro-architecture
+    build_jobs = []
+    for (host_arch, host_partition, job_partition, job_gpus) in build_plan:
         job_options = dict(job)
 
         # without special target arch, target host arch
@@ -246,11 +296,11 @@ def main():
         if opts.options.tmp:
             job['tmp'] = '/tmp'
         elif opts.options.tmp_scratch:
-            job['tmp'] = os.path.join('$VSC_SCRATCH', job_options['target_arch'])
-        ebconf['buildpath'] = os.path.join(job['tmp'], 'eb-submit-build')
+            job['tmp'] = f"$VSC_SCRATCH/{job_options['target_arch']}"
+        ebconf['buildpath'] = f"{job['tmp']}/eb-submit-build"
 
         # generate EB command line options
-        eb_options = ['--robot', '--logtostdout', '--debug', '--module-extensions', '--zip-logs=bzip2']
+        eb_options = list(COMMON_EB_OPTIONS)
 
         # cross-compilation
         if job_options['target_arch'] != host_arch:
@@ -260,56 +310,46 @@ def main():
         eb_options.append("--module-depends-on")
 
         # extra settings from user
-        if opts.options.extra_flags:
-            eb_options.append(opts.options.extra_flags)
+        eb_options.extend(extra_eb_options)
 
-        eb_options.append(easyconfig)
+        eb_options.extend(opts.args)
 
         # update build and install paths of the EB job
         install_dir = job_options['target_arch']
-        ebconf['installpath'] = os.path.join(APPS_BRUSSEL, os.getenv('VSC_OS_LOCAL'), install_dir)
-        for opt, path in ebconf.items():
-            eb_options.append(f'--{opt}={path}')
+        ebconf['installpath'] = f"{APPS_BRUSSEL}/{os.getenv('VSC_OS_LOCAL')}/{install_dir}"
+        eb_options.extend(ebconf_options)
+        eb_options.extend([f"--buildpath={ebconf['buildpath']}", f"--installpath={ebconf['installpath']}"])
 
         # set Slurm directives in job file
         job_options.update(
             {
-                'job_name': mk_job_name(easyconfig, host_arch, job_options['target_arch']),
+                'job_name': mk_job_name(easyconfig, host_arch, job_options['target_arch'], mod_name=mod_name),
                 'walltime': '23:59:59',
                 'nodes': 1,
                 'tasks': 4,
-                'gpus': 0,
-                'partition': host_partition,
+                'gpus': job_gpus,
+                'partition': job_partition,
                 'cluster': PARTITIONS[host_partition].get('cluster', 'hydra'),
-                'eb_options': " ".join(eb_options),
+                'eb_options': eb_options,
                 'eb_buildpath': ebconf['buildpath'],
                 'eb_installpath': ebconf['installpath'],
             }
         )
 
-        # settings for builds with GPUs
-        if opts.options.gpu:
-            if ARCHS[host_arch]['partition']['gpu']:
-                # install on GPU partition on archs with GPUs
-                job_options['partition'] = ARCHS[host_arch]['partition']['gpu']
-                job_options['gpus'] = 1
-
         # add extra footer if requested
         if opts.options.extra_mod_footer:
-            job_options['eb_options'] += f' --modules-footer={job_options["extra_mod_footer"]}'
+            job_options['eb_options'].append(f'--modules-footer={job_options["extra_mod_footer"]}')
 
         # install in new namespace if requested
         if bwrap:
-            job_options['eb_options'] += ' --rebuild'
+            job_options['eb_options'].append('--rebuild')
             job_options['pre_eb_options'] = bwrap_prefix(job_options, module[0], install_dir)
             rsync_cmds = rsync_copy(job_options, module[0], module[1], install_dir)
             job_options['postinstall'] = '\n'.join([rsync_cmds, job_options['postinstall']])
 
-        # submit build job
-        buildjob_out = None
-
         if job_options['partition']:
             logger.debug('job_options: %s', job_options)
+            build_jobs.append(job_options)
 
             logger.info(
                 "Building %s on %s (%s) for %s",
@@ -319,18 +359,43 @@ def main():
                 job_options['target_arch'],
             )
 
-            ec, buildjob_out = submit_build_job(
-                job_options,
-                keep_job=opts.options.keep,
-                sub_options=opts.options.extra_sub_flags,
-                cluster=job_options['cluster'],
-                local_exec=local_exec,
-                dry_run=dry_run,
+    if not build_jobs:
+        return
+
+    def submit_job(job_options):
+        return submit_build_job(
+            job_options,
+            keep_job=opts.options.keep,
+            sub_options=opts.options.extra_sub_flags,
+            cluster=job_options['cluster'],
+            local_exec=local_exec,
+            dry_run=dry_run,
+        )
+
+    if local_exec:
+        # local builds run one after the other
+        build_results = map(submit_job, build_jobs)
+    else:
+        # submit build jobs concurrently, each submission mostly waits on Slurm
+        with ThreadPoolExecutor(max_workers=min(MAX_SUBMIT_WORKERS, len(build_jobs))) as submit_pool:
+            build_results = list(submit_pool.map(submit_job, build_jobs))
+
+    failed_jobs = 0
+    for job_options, (ec, buildjob_out) in zip(build_jobs, build_results):
+        if ec != 0:
+            logger.error(
+                "Failed to submit or run build job for '%s' on %s: %s",
+                easyconfig,
+                job_options['partition'],
+                buildjob_out,
             )
+            failed_jobs += 1
+            if local_exec:
+                # stop local builds at the first failure
+                break
 
-            if ec != 0:
-                logger.error("Failed to submit or run build job for '%s': %s", easyconfig, buildjob_out)
-                sys.exit(1)
+    if failed_jobs:
+        sys.exit(1)
 
 
 if __name__ == '__main__':
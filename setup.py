@@ -17,11 +17,28 @@ build_tools base distribution setup.py
 @author: Alex Domingo (Vrije Universiteit Brussel)
 """
 
+import ast
+
 import setuptools
 
-PKG = {}
-with open("src/build_tools/package.py", encoding='utf-8') as fh:
-    exec(fh.read(), PKG)
+
+def read_package_info(path, names=('VERSION', 'AUTHOR', 'AUTHOR_EMAIL')):
+    """
+    Read literal definitions of given names from package file without executing it
+    """
+    with open(path, encoding='utf-8') as fh:
+        pkg_tree = ast.parse(fh.read(), filename=path)
+
+    pkg_info = {}
+    for node in pkg_tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in names:
+                pkg_info[node.targets[0].id] = ast.literal_eval(node.value)
+
+    return pkg_info
+
+
+PKG = read_package_info("src/build_tools/package.py")
 
 with open("README.md", "r", encoding='utf-8') as fh:
     long_description = fh.read()
@@ -26,6 +26,24 @@ from build_tools.filetools import APPS_BRUSSEL
 
 logger = fancylogger.getLogger()
 
+# root of installations in new namespaces, shared by all architectures
+BWRAP_ROOT = os.path.join(APPS_BRUSSEL, 'bwrap', '$VSC_OS_LOCAL')
+
+# commands to copy installations from the bwrap dir to the real installation dir
+RSYNC_COPY_TEMPLATE = """\
+echo "bwrap install dir: {source_soft_path}"
+echo "destination install dir: {dest_soft_path}"
+echo "bwrap module file: {source_mod_file}"
+echo "destination module file: {dest_mod_file}"
+if [ ! -d {source_soft_path} ]; then echo "ERROR: bwrap install dir does not exist"; exit 1; fi
+if [ ! "$(ls -A {source_soft_path})" ]; then echo "ERROR: bwrap install dir empty"; exit 1; fi
+if [ ! -s {source_mod_file} ]; then echo "ERROR: bwrap module file does not exist or empty"; exit 1; fi
+rsync -a --link-dest={source_soft_path} {source_soft_path} {dest_soft_path}
+if [ $? -ne 0 ]; then echo "ERROR: failed to copy bwrap install dir"; exit 1; fi
+rsync -a --link-dest={source_mod_path} {source_mod_file} {dest_mod_file}
+if [ $? -ne 0 ]; then echo "ERROR: failed to copy bwrap module file"; exit 1; fi
+rm -rf {source_soft_path} {source_mod_file}"""
+
 
 def bwrap_prefix(job_options, modname, install_dir):
     """
@@ -35,27 +53,27 @@ def bwrap_prefix(job_options, modname, install_dir):
     :param install_dir: architecture-specific installation subdirectory
     """
 
-    bwrap_path = os.path.join(APPS_BRUSSEL, 'bwrap', '$VSC_OS_LOCAL', install_dir)
+    bwrap_path = f'{BWRAP_ROOT}/{install_dir}'
     real_installpath = os.path.realpath(job_options['eb_installpath'])
-    mod_subdir = os.path.join('modules', job_options['tc_gen'], 'all', modname)
-    soft_subdir = os.path.join('software', modname)
+    mod_subdir = f"modules/{job_options['tc_gen']}/all/{modname}"
+    soft_subdir = f'software/{modname}'
 
-    soft_source = os.path.join(bwrap_path, soft_subdir)
-    soft_dest = os.path.join(real_installpath, soft_subdir)
+    soft_source = f'{bwrap_path}/{soft_subdir}'
+    soft_dest = f'{real_installpath}/{soft_subdir}'
 
-    mod_source = os.path.join(bwrap_path, mod_subdir)
-    mod_dest = os.path.join(real_installpath, mod_subdir)
+    mod_source = f'{bwrap_path}/{mod_subdir}'
+    mod_dest = f'{real_installpath}/{mod_subdir}'
 
     if not os.path.isdir(soft_dest):
         logger.error("Bind destination does not exist: %s", soft_dest)
 
     return ' '.join([
-        'mkdir -p %s &&' % soft_source,
-        'mkdir -p %s &&' % mod_source,
+        f'mkdir -p {soft_source} &&',
+        f'mkdir -p {mod_source} &&',
         'bwrap',
         '--bind / /',
-        '--bind %s %s' % (soft_source, soft_dest),
-        '--bind %s %s' % (mod_source, mod_dest),
+        f'--bind {soft_source} {soft_dest}',
+        f'--bind {mod_source} {mod_dest}',
         '--dev /dev',
         '--bind /dev/log /dev/log',
     ])
@@ -71,44 +89,25 @@ def rsync_copy(job_options, modname, modversion, install_dir):
     :param modversion: module version
     :param install_dir: architecture-specific installation subdirectory
     """
-    source_path = os.path.join(APPS_BRUSSEL, 'bwrap', '$VSC_OS_LOCAL', install_dir)
+    source_path = f'{BWRAP_ROOT}/{install_dir}'
     dest_path = job_options['eb_installpath']
 
-    rel_soft_path = os.path.join('software', modname, modversion, '')  # trailing slash is required!
+    rel_soft_path = f'software/{modname}/{modversion}/'  # trailing slash is required!
 
-    source_soft_path = os.path.join(source_path, rel_soft_path)
-    dest_soft_path = os.path.join(dest_path, rel_soft_path)
+    source_soft_path = f'{source_path}/{rel_soft_path}'
+    dest_soft_path = f'{dest_path}/{rel_soft_path}'
 
-    rel_mod_path = os.path.join('modules', job_options['tc_gen'], 'all', modname)
-    rel_mod_file = os.path.join(rel_mod_path, '%s.lua' % modversion)
+    rel_mod_path = f"modules/{job_options['tc_gen']}/all/{modname}"
+    rel_mod_file = f'{rel_mod_path}/{modversion}.lua'
 
-    source_mod_path = os.path.join(source_path, rel_mod_path)
-    source_mod_file = os.path.join(source_path, rel_mod_file)
-    dest_mod_file = os.path.join(dest_path, rel_mod_file)
+    source_mod_path = f'{source_path}/{rel_mod_path}'
+    source_mod_file = f'{source_path}/{rel_mod_file}'
+    dest_mod_file = f'{dest_path}/{rel_mod_file}'
 
-    rsync_software = ' '.join([
-        'rsync -a',
-        '--link-dest=%s' % source_soft_path,
-        source_soft_path,
-        dest_soft_path,
-    ])
-    rsync_module = ' '.join([
-        'rsync -a',
-        '--link-dest=%s' % source_mod_path,
-        source_mod_file,
-        dest_mod_file,
-    ])
-    return '\n'.join([
-        'echo "bwrap install dir: %s"' % source_soft_path,
-        'echo "destination install dir: %s"' % dest_soft_path,
-        'echo "bwrap module file: %s"' % source_mod_file,
-        'echo "destination module file: %s"' % dest_mod_file,
-        'if [ ! -d %s ]; then echo "ERROR: bwrap install dir does not exist"; exit 1; fi' % source_soft_path,
-        'if [ ! "$(ls -A %s)" ]; then echo "ERROR: bwrap install dir empty"; exit 1; fi' % source_soft_path,
-        'if [ ! -s %s ]; then echo "ERROR: bwrap module file does not exist or empty"; exit 1; fi' % source_mod_file,
-        rsync_software,
-        'if [ $? -ne 0 ]; then echo "ERROR: failed to copy bwrap install dir"; exit 1; fi',
-        rsync_module,
-        'if [ $? -ne 0 ]; then echo "ERROR: failed to copy bwrap module file"; exit 1; fi',
-        'rm -rf %s %s' % (source_soft_path, source_mod_file),
-    ])
+    return RSYNC_COPY_TEMPLATE.format(
+        source_soft_path=source_soft_path,
+        dest_soft_path=dest_soft_path,
+        source_mod_path=source_mod_path,
+        source_mod_file=source_mod_file,
+        dest_mod_file=dest_mod_file,
+    )
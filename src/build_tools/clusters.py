@@ -131,3 +131,7 @@ PARTITIONS = {
         'arch': 'zen4',
     },
 }
+
+# architectures installed by default and architectures with GPUs
+DEFAULT_ARCHS = [arch for (arch, prop) in ARCHS.items() if prop['default']]
+GPU_ARCHS = {arch for (arch, prop) in ARCHS.items() if prop['partition']['gpu']}
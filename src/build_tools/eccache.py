@@ -0,0 +1,325 @@
+#
+# Copyright 2017-2024 Vrije Universiteit Brussel
+# All rights reserved.
+#
+# This file is part of build_tools (https://github.com/vub-hpc/build_tools),
+# originally created by the HPC team of Vrije Universiteit Brussel (https://hpc.vub.be),
+# with support of Vrije Universiteit Brussel (https://www.vub.be),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# the Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+##
+"""
+Persistent cache of module metadata parsed from easyconfigs
+
+@author: Alex Domingo (Vrije Universiteit Brussel)
+"""
+
+import ast
+import configparser
+import dbm
+import fcntl
+import glob
+import hashlib
+import os
+import pickle
+import shelve
+import time
+from contextlib import contextmanager
+
+from vsc.utils import fancylogger
+
+logger = fancylogger.getLogger()
+
+EC_CACHE_DIR = os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'build_tools')
+EC_CACHE_FILE = os.path.join(EC_CACHE_DIR, 'ec_parse.db')
+# time in seconds after which cached metadata is parsed again, and maximum number of cached easyconfigs
+EC_CACHE_EXPIRY = 30 * 24 * 3600
+EC_CACHE_MAX_ENTRIES = 10000
+# errors raised by shelve on truncated or corrupt cache entries
+EC_CACHE_ENTRY_ERRORS = (
+    pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, TypeError, ValueError,
+)
+
+# easyconfig parameters defining the module name in EasyBuildMNS
+EC_MODNAME_PARAMS = ['name', 'version', 'versionprefix', 'versionsuffix', 'toolchain', 'moduleclass']
+# easyconfig parameters altering the module name that require a full parse with EasyBuild
+EC_MODNAME_COMPLEX_PARAMS = ['hidden', 'modaltsoftname']
+
+
+@contextmanager
+def open_ec_cache():
+    """
+    Open the easyconfig cache with an exclusive lock on it
+    """
+    os.makedirs(EC_CACHE_DIR, exist_ok=True)
+    with open(f'{EC_CACHE_FILE}.lock', 'w', encoding='utf-8') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        with shelve.open(EC_CACHE_FILE) as cache:
+            yield cache
+
+
+def read_cache_entry(cache, key):
+    """
+    Return time and metadata cached with given key in open easyconfig cache
+    Return None if missing, invalid or expired, unreadable entries are dropped from the cache
+    """
+    try:
+        entry = cache.get(key)
+    except EC_CACHE_ENTRY_ERRORS as err:
+        logger.warning("Dropping unreadable entry '%s' from easyconfig cache: %s", key, err)
+        del cache[key]
+        return None
+
+    if not isinstance(entry, tuple) or len(entry) != 2 or not isinstance(entry[0], float):
+        return None
+    if time.time() - entry[0] > EC_CACHE_EXPIRY:
+        return None
+
+    return entry
+
+
+def prune_ec_cache(cache):
+    """
+    Remove invalid and expired entries from open easyconfig cache
+    Only the EC_CACHE_MAX_ENTRIES most recent entries are kept
+    """
+    entry_times = {}
+    for key in list(cache.keys()):
+        entry = read_cache_entry(cache, key)
+        if entry:
+            entry_times[key] = entry[0]
+        elif key in cache:
+            del cache[key]
+
+    for key in sorted(entry_times, key=entry_times.get, reverse=True)[EC_CACHE_MAX_ENTRIES:]:
+        del cache[key]
+
+
+def get_eb_configfiles():
+    """
+    Return paths of EasyBuild configuration files in use, following the same rules as EasyBuild
+    Configuration files given in the environment replace the default ones, ignored configuration files are skipped
+    """
+    ignored = {os.path.realpath(path) for path in os.getenv('EASYBUILD_IGNORECONFIGFILES', '').split(',') if path}
+
+    configfiles = os.getenv('EASYBUILD_CONFIGFILES')
+    if configfiles is not None:
+        return [path for path in configfiles.split(',') if path and os.path.realpath(path) not in ignored]
+
+    xdg_config_home = os.getenv('XDG_CONFIG_HOME', os.path.join(os.path.expanduser('~'), '.config'))
+    xdg_config_dirs = os.getenv('XDG_CONFIG_DIRS', '/etc/xdg').split(os.pathsep)
+
+    # later files take precedence: XDG_CONFIG_HOME > first entry of XDG_CONFIG_DIRS > second entry ...
+    configfiles = []
+    for cfg_dir in reversed(xdg_config_dirs):
+        configfiles.extend(sorted(glob.glob(os.path.join(cfg_dir, 'easybuild.d', '*.cfg'))))
+    configfiles.append(os.path.join(xdg_config_home, 'easybuild', 'config.cfg'))
+
+    return [path for path in configfiles if os.path.isfile(path) and os.path.realpath(path) not in ignored]
+
+
+def get_module_naming_scheme():
+    """
+    Return module naming scheme set in the environment or in EasyBuild configuration files
+    Default to EasyBuildMNS as EasyBuild, options given to EasyBuild on the command line are not considered
+    """
+    mns = os.getenv('EASYBUILD_MODULE_NAMING_SCHEME')
+    if mns:
+        return mns
+
+    config = configparser.ConfigParser(interpolation=None, strict=False)
+    try:
+        config.read(get_eb_configfiles(), encoding='utf-8')
+    except configparser.Error as err:
+        logger.warning("Failed to read EasyBuild configuration files: %s", err)
+        return 'unknown'
+
+    for section in reversed(config.sections()):
+        mns = config[section].get('module-naming-scheme') or config[section].get('module_naming_scheme')
+        if mns:
+            return mns
+
+    return 'EasyBuildMNS'
+
+
+def eb_config_id():
+    """
+    Return identifier of the EasyBuild configuration that defines module names
+    Based on the naming scheme set in the environment and the contents of the EasyBuild configuration files
+    """
+    config_hash = hashlib.sha1(os.getenv('EASYBUILD_MODULE_NAMING_SCHEME', '').encode('utf-8'))
+    for configfile in get_eb_configfiles():
+        config_hash.update(configfile.encode('utf-8'))
+        try:
+            with open(configfile, 'rb') as handle:
+                config_hash.update(handle.read())
+        except OSError:
+            pass
+
+    return config_hash.hexdigest()
+
+
+def ec_cache_key(easyconfig, config_id=None):
+    """
+    Return cache key of given easyconfig file based on its contents
+    Copies of the same easyconfig share the same key
+    """
+    with open(easyconfig, 'rb') as handle:
+        ec_hash = hashlib.sha1(handle.read()).hexdigest()
+
+    # module names depend on the EasyBuild configuration in use
+    if config_id is None:
+        config_id = eb_config_id()
+
+    return f"{ec_hash}:{config_id}"
+
+
+def quick_parse_easyconfig(easyconfig, mns=None):
+    """
+    Get module metadata of given easyconfig file from its literal definitions, without EasyBuild
+    Only supports the default module naming scheme EasyBuildMNS
+    :param mns: module naming scheme in use, resolved from the environment and configuration files if not given
+    Return None if the easyconfig has to be parsed by EasyBuild
+    """
+    if mns is None:
+        mns = get_module_naming_scheme()
+    if mns != 'EasyBuildMNS':
+        return None
+
+    try:
+        with open(easyconfig, 'r', encoding='utf-8') as handle:
+            ec_tree = ast.parse(handle.read(), filename=easyconfig)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    ec_params = {'versionprefix': '', 'versionsuffix': '', 'moduleclass': 'base'}
+    for node in ec_tree.body:
+        if not isinstance(node, ast.Assign) or len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+            continue
+
+        param = node.targets[0].id
+        if param in EC_MODNAME_COMPLEX_PARAMS:
+            return None
+        if param not in EC_MODNAME_PARAMS:
+            continue
+
+        if param == 'toolchain' and isinstance(node.value, ast.Name) and node.value.id == 'SYSTEM':
+            ec_params[param] = {'name': 'system', 'version': 'system'}
+            continue
+
+        try:
+            ec_params[param] = ast.literal_eval(node.value)
+        except (ValueError, TypeError, SyntaxError):
+            # dynamic definition
+            return None
+
+    toolchain = ec_params.pop('toolchain', None)
+    if not isinstance(toolchain, dict) or sorted(toolchain) != ['name', 'version']:
+        return None
+    if 'name' not in ec_params or 'version' not in ec_params:
+        # defined outside of top-level assignments
+        return None
+
+    ec_params.update({f'toolchain_{key}': value for key, value in toolchain.items()})
+    if any(not isinstance(value, str) or '%(' in value for value in ec_params.values()):
+        # missing parameters or templated values
+        return None
+
+    ec_version = ec_params['version']
+    if ec_params['toolchain_name'] != 'system':
+        ec_version += f"-{ec_params['toolchain_name']}-{ec_params['toolchain_version']}"
+
+    return {
+        'full_mod_name': f"{ec_params['name']}/{ec_params['versionprefix']}{ec_version}{ec_params['versionsuffix']}",
+        'moduleclass': ec_params['moduleclass'],
+    }
+
+
+def parse_easyconfig_files(easyconfigs, eb_args=None):
+    """
+    Parse easyconfig files with EasyBuild and return their module metadata in the same order
+    All files are parsed in a single pass, EasyBuild is only imported here as it is costly to load and configure
+    :param eb_args: list of EasyBuild options to configure the parse, such as custom easyblocks and robot paths
+    """
+    from easybuild.framework.easyconfig.tools import parse_easyconfigs
+    from easybuild.tools.options import set_up_configuration
+
+    # skip the index of easyconfig repos, given paths are files
+    os.environ.setdefault('EASYBUILD_IGNORE_INDEX', '1')
+    set_up_configuration(args=list(eb_args or []), silent=True)
+
+    ec_paths = list(dict.fromkeys(os.path.abspath(ec) for ec in easyconfigs))
+    parsed_ecs, _ = parse_easyconfigs([(ec_path, False) for ec_path in ec_paths])
+
+    ec_metadata = {
+        os.path.realpath(parsed_ec['spec']): {
+            'full_mod_name': parsed_ec['full_mod_name'],
+            'moduleclass': parsed_ec['ec']['moduleclass'],
+        }
+        for parsed_ec in parsed_ecs
+    }
+
+    return [ec_metadata[os.path.realpath(ec)] for ec in easyconfigs]
+
+
+def get_ecs_metadata(easyconfigs, use_easybuild=True, eb_args=None):
+    """
+    Get module metadata of given easyconfig files in the same order
+    Metadata is read from cache if available, otherwise the easyconfigs are parsed and their metadata cached
+    :param use_easybuild: parse with EasyBuild any easyconfigs that need it, otherwise their metadata is None
+    :param eb_args: list of EasyBuild options to parse easyconfigs with EasyBuild
+    """
+    config_id = eb_config_id()
+    keys = [ec_cache_key(ec, config_id) for ec in easyconfigs]
+
+    try:
+        with open_ec_cache() as cache:
+            metadata = [(read_cache_entry(cache, key) or (None, None))[1] for key in keys]
+    except dbm.error as err:
+        logger.warning("Failed to read easyconfig cache '%s': %s", EC_CACHE_FILE, err)
+        metadata = [None] * len(keys)
+
+    missing = [idx for idx, ec_meta in enumerate(metadata) if not ec_meta]
+    if not missing:
+        logger.debug("Found cached metadata of easyconfigs: %s", ', '.join(easyconfigs))
+        return metadata
+
+    # plain easyconfigs do not need EasyBuild
+    mns = get_module_naming_scheme()
+    for idx in missing:
+        metadata[idx] = quick_parse_easyconfig(easyconfigs[idx], mns=mns)
+
+    unparsed = [idx for idx in missing if not metadata[idx]]
+    if unparsed and use_easybuild:
+        parsed_metadata = parse_easyconfig_files([easyconfigs[idx] for idx in unparsed], eb_args=eb_args)
+        for idx, ec_meta in zip(unparsed, parsed_metadata):
+            metadata[idx] = ec_meta
+
+    try:
+        with open_ec_cache() as cache:
+            for idx in missing:
+                if metadata[idx]:
+                    cache[keys[idx]] = (time.time(), metadata[idx])
+            prune_ec_cache(cache)
+    except dbm.error as err:
+        logger.warning("Failed to update easyconfig cache '%s': %s", EC_CACHE_FILE, err)
+
+    return metadata
+
+
+def get_ec_metadata(easyconfig, use_easybuild=True):
+    """
+    Get module metadata of given easyconfig file
+    """
+    return get_ecs_metadata([easyconfig], use_easybuild=use_easybuild)[0]
+
+
+def get_full_mod_name(easyconfig, use_easybuild=True):
+    """
+    Get full module name of given easyconfig file
+    Return None if it needs EasyBuild and use_easybuild is False
+    """
+    ec_metadata = get_ec_metadata(easyconfig, use_easybuild=use_easybuild)
+    return ec_metadata['full_mod_name'] if ec_metadata else None
@@ -16,14 +16,18 @@ Helper functions to handle temp files
 @author: Samuel Moors (Vrije Universiteit Brussel)
 """
 
+import functools
 import os
 import re
+import shlex
 import sys
 import tempfile
 
 from vsc.utils import fancylogger
 from vsc.utils.run import RunNoShell
 
+from build_tools.eccache import get_full_mod_name
+
 
 logger = fancylogger.getLogger()
 
@@ -33,15 +37,28 @@ APPS_BRUSSEL = os.path.join(os.path.sep, 'apps', 'brussel')
 def write_tempfile(contents):
     """
     Helper function to write tmp file, it returns the actual filename
+    Contents can be a string or bytes, empty contents create an empty file
     """
+    if isinstance(contents, str):
+        contents = contents.encode('utf-8')
+
     try:
-        with tempfile.NamedTemporaryFile(mode='w', delete=False) as handle:
+        fd, filename = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as handle:
             handle.write(contents)
-    except IOError as err:
+    except OSError as err:
         logger.error("Error writing tmp file: %s", err)
         sys.exit(1)
 
-    return handle.name
+    return filename
+
+
+@functools.lru_cache(maxsize=256)
+def block_pattern(first_line, last_line):
+    """
+    Return compiled regex matching any block of text between given first and last lines
+    """
+    return re.compile(f'^{re.escape(first_line)}.*{re.escape(last_line)}$', re.MULTILINE | re.DOTALL)
 
 
 def clean_append(filepath, new_content):
@@ -51,26 +68,24 @@ def clean_append(filepath, new_content):
     - filepath: (string) path to new or existing file
     - new_content: (string) content to be added to the file
     """
+    # use first and last line in new content to match any block text
+    new_lines = new_content.split('\n')
+
     try:
-        with open(filepath, 'r', encoding='utf-8') as handle:
+        # single open of new or existing file, writes always go to its end
+        with open(filepath, 'a+', encoding='utf-8') as handle:
+            handle.seek(0)
             existing_content = handle.read()
-    except IOError:
-        existing_content = ''
-        logger.debug("File does not exits, creating it: %s", filepath)
-
-    if existing_content:
-        # clean up the existing file content of any previous text matching new content
-        # use first and last line in new content to match any block text
-        boundaries = new_content.split('\n')
-        boundaries = (re.escape(boundaries[0]), re.escape(boundaries[-1]))
-        block_pattern = re.compile('^%s.*%s$' % boundaries, re.MULTILINE | re.DOTALL)
-        existing_content = block_pattern.sub('', existing_content)
-
-    # update/create file with new content
-    file_content = existing_content + new_content
-    try:
-        with open(filepath, 'w+', encoding='utf-8') as handle:
-            handle.write(file_content)
+
+            if existing_content and new_lines[0] in existing_content:
+                # clean up the existing file content of any previous text matching new content
+                clean_content = block_pattern(new_lines[0], new_lines[-1]).sub('', existing_content)
+                if clean_content != existing_content:
+                    handle.truncate(0)
+                    handle.write(clean_content)
+
+            # existing files without previous content are only appended to
+            handle.write(new_content)
     except IOError as err:
         logger.error("Error writing file '%s': %s", filepath, err)
         sys.exit(1)
@@ -96,21 +111,35 @@ def poke(filename):
         return True
 
 
-def get_module(easyconfig, cmd='get_module_from_easyconfig.py'):
+def get_module(easyconfig, cmd='get_module_from_easyconfig.py', eb_options=None):
     """
     Get module name and version from an easyconfig file
+    - eb_options: (list of strings) EasyBuild options to parse the easyconfig, such as custom easyblocks
     @return: (exit_code, [module_name, module_version])
     """
-    # let EB find the easyconfig and copy it to a tmp file
-    temp_ec = write_tempfile('')
-    copy_cmd = "eb %s --copy-ec %s" % (easyconfig, temp_ec)
-    log_msg = "Copying easyconfig %s to %s..." % (easyconfig, temp_ec)
-    logger.debug(log_msg)
-    ec, out = RunNoShell.run(copy_cmd)
+    if os.path.isfile(easyconfig):
+        # local easyconfigs found in cache or plain enough to not need EasyBuild are resolved in this process
+        full_mod_name = get_full_mod_name(easyconfig, use_easybuild=False)
+        if full_mod_name:
+            return 0, full_mod_name.split('/')
+        ec_path = easyconfig
+    else:
+        # let EB find the easyconfig and copy it to a tmp file
+        ec_path = write_tempfile('')
+        copy_cmd = ['eb', easyconfig, '--copy-ec', ec_path]
+        log_msg = "Copying easyconfig %s to %s..." % (easyconfig, ec_path)
+        logger.debug(log_msg)
+        ec, out = RunNoShell.run(copy_cmd)
+        if ec != 0:
+            logger.error("Failed to copy easyconfig %s: %s", easyconfig, out)
+            return ec, []
 
     # use EB functions to obtain module name/version
     # this must be an external script due to option parsing conflicts between EB and submit_build.py
-    cmd += " %s" % temp_ec
-    ec, out = RunNoShell.run(cmd)
+    # and to keep changes made by EB to the environment out of this process
+    ec, out = RunNoShell.run(shlex.split(cmd) + list(eb_options or []) + [ec_path])
+    if ec != 0:
+        logger.warning("Failed to parse easyconfig %s: %s", easyconfig, out)
+        return ec, []
 
     return ec, out.splitlines()[-1].split('/')
@@ -18,6 +18,7 @@ Custom EasyBuild hooks for VUB-HPC Clusters
 """
 
 import os
+import random
 import time
 
 from flufl.lock import Lock, TimeOutError, NotLockedError
@@ -32,8 +33,10 @@ from easybuild.tools.config import source_paths
 from easybuild.tools.filetools import mkdir
 from easybuild.tools.hooks import SANITYCHECK_STEP
 
-from build_tools.clusters import ARCHS
-from build_tools.ib_modules import IB_MODULE_SOFTWARE, IB_MODULE_SUFFIX, IB_OPT_MARK
+from build_tools.clusters import ARCHS, GPU_ARCHS
+from build_tools.ib_modules import (
+    IB_MODULE_OPTS_IB, IB_MODULE_OPTS_NOIB, IB_MODULE_SOFTWARE, IB_MODULE_SUFFIX, IB_OPT_MARK_REGEX,
+)
 from build_tools.lmodtools import submit_lmod_cache_job
 
 # permission groups for licensed software
@@ -58,79 +61,122 @@ SOFTWARE_GROUPS = {
     'VASP': 'bvasp',
 }
 
-GPU_ARCHS = [x for (x, y) in ARCHS.items() if y['partition']['gpu']]
+# links to our documentation for software covered in
+# https://hpc.vub.be/docs/software/usecases/
+DOC_URL = 'https://hpc.vub.be/docs/software/usecases/'
+DOC_APPS = ['MATLAB', 'R', 'Gaussian', 'GaussView', 'matplotlib', ('CESM-deps', 'cesm-cime'), 'GAP', 'Mathematica',
+            'Stata', 'GROMACS', 'CP2K', 'PyTorch', 'ORCA', 'SRA-Toolkit', 'AlphaFold', 'OpenFold', 'GAMESS-US']
+DOC_APP_LINKS = {
+    app: '#'.join([DOC_URL, anchor])
+    for (app, anchor) in [(app, app.lower()) if isinstance(app, str) else app for app in DOC_APPS]
+}
+
+# optarch for intel compilers on AMD nodes
+OPTARCHS_INTEL = {
+    'zen2': 'march=core-avx2',
+    # common-avx512 gives test failure for scipy
+    # see https://github.com/easybuilders/easybuild-easyconfigs/pull/18875
+    'zen4': 'march=rocketlake',
+}
+INTEL_TOOLCHAINS = {'intel-compilers', 'iimpi', 'iimkl', 'intel'}
 
 LOCAL_ARCH = os.getenv('VSC_ARCH_LOCAL')
 LOCAL_ARCH_SUFFIX = os.getenv('VSC_ARCH_SUFFIX')
 LOCAL_ARCH_FULL = f'{LOCAL_ARCH}{LOCAL_ARCH_SUFFIX}'
 
 
-def parse_hook(ec, *args, **kwargs):  # pylint: disable=unused-argument
-    """Alter the parameters of easyconfigs"""
+# munge component of PMIx by minimum version, newest first
+# PMIx-v4 does not have the specific plugin for psec-munge,
+# but now it has a plugin for Slurm that links to munge
+PMIX_SLURM_LIBS = [
+    ('4.2', 'lib/pmix/pmix_mca_prm_slurm.so'),
+    ('4.0', 'lib/pmix/mca_prm_slurm.so'),
+    ('0', 'lib/pmix/mca_psec_munge.so'),
+]
+
+
+def parse_pmix(ec):
+    """Alter the parameters of PMIx easyconfigs"""
 
     # PMIx deps and sanity checks for munge
-    if ec.name == 'PMIx':
-        # Add osdependency on munge-devel
-        extradep = 'munge-devel'
-        ec.log.info("[parse hook] Adding OS dependency on: %s", extradep)
-        ec['osdependencies'].append(extradep)
-        # Add sanity check on munge component
-        ec.log.info("[parse hook] Adding sanity check on munge component")
-        # PMIx-v4 does not have the specific plugin for psec-munge,
-        # but now it has a plugin for Slurm that links to munge
-        if LooseVersion(ec.version) >= LooseVersion('4.2'):
-            pmix_slurm_lib = 'lib/pmix/pmix_mca_prm_slurm.so'
-        elif LooseVersion(ec.version) >= LooseVersion('4.0'):
-            pmix_slurm_lib = 'lib/pmix/mca_prm_slurm.so'
-        else:
-            pmix_slurm_lib = 'lib/pmix/mca_psec_munge.so'
+    # Add osdependency on munge-devel
+    extradep = 'munge-devel'
+    ec.log.info("[parse hook] Adding OS dependency on: %s", extradep)
+    ec['osdependencies'].append(extradep)
+    # Add sanity check on munge component
+    ec.log.info("[parse hook] Adding sanity check on munge component")
+    pmix_version = LooseVersion(ec.version)
+    pmix_slurm_lib = next(lib for (min_version, lib) in PMIX_SLURM_LIBS if pmix_version >= min_version)
+
+    ec['sanity_check_paths']['files'].append(pmix_slurm_lib)
+
+
+def parse_openmpi(ec):
+    """Alter the parameters of OpenMPI easyconfigs"""
+
+    # OpenFabrics support
+    # remove libfabric from OpenMPI on all partitions
+    if any('libfabric' in d for d in ec['dependencies']):
+        ec['dependencies'] = [d for d in ec['dependencies'] if 'libfabric' not in d]
+        ec.log.info("[parse hook] Removed libfabric from dependency list")
+
+
+def parse_gurobi(ec):
+    """Alter the parameters of Gurobi easyconfigs"""
+
+    # use centrally installed Gurobi license file, and don't copy to installdir
+    ec['license_file'] = '/apps/brussel/licenses/gurobi/gurobi.lic'
+    ec.log.info(f"[parse hook] Set parameter license_file: {ec['license_file']}")
+    ec['copy_license_file'] = False
+    ec.log.info(f"[parse hook] Set parameter copy_license_file: {ec['copy_license_file']}")
+
+
+def parse_matlab(ec):
+    """Alter the parameters of MATLAB easyconfigs"""
+
+    ec['license_file'] = '/apps/brussel/licenses/matlab/network.lic'
+    ec.log.info(f"[parse hook] Set parameter license_file: {ec['license_file']}")
+    # replace copy of license file in install dir with link to original license
+    ec['postinstallcmds'] = [f'ln -sfb {ec["license_file"]} %(installdir)s/licenses/']
+    ec.log.info(f"[parse hook] Set parameter postinstallcmds: {ec['postinstallcmds']}")
+
+
+# software specific changes in parse_hook
+PARSE_SOFTWARE = {
+    'PMIx': parse_pmix,
+    'OpenMPI': parse_openmpi,
+    'Gurobi': parse_gurobi,
+    'MATLAB': parse_matlab,
+}
+
+
+def parse_hook(ec, *args, **kwargs):  # pylint: disable=unused-argument
+    """Alter the parameters of easyconfigs"""
 
-        ec['sanity_check_paths']['files'].append(pmix_slurm_lib)
+    parse_software = PARSE_SOFTWARE.get(ec.name)
+    if parse_software:
+        parse_software(ec)
 
     # InfiniBand support
     if ec.name in IB_MODULE_SOFTWARE:
         # remove any OS dependency on libverbs in non-IB nodes
         if LOCAL_ARCH_SUFFIX != IB_MODULE_SUFFIX:
             pkg_ibverbs = EASYCONFIG_CONSTANTS['OS_PKG_IBVERBS_DEV'][0]
-            ec['osdependencies'] = [d for d in ec['osdependencies'] if d != pkg_ibverbs]
-            ec.log.info("[parse hook] Removed IB from OS dependencies on non-IB system: %s", ec['osdependencies'])
+            if pkg_ibverbs in ec['osdependencies']:
+                ec['osdependencies'] = [d for d in ec['osdependencies'] if d != pkg_ibverbs]
+                ec.log.info("[parse hook] Removed IB from OS dependencies on non-IB system: %s", ec['osdependencies'])
 
-    # OpenFabrics support
-    if ec.name == 'OpenMPI':
-        # remove libfabric from OpenMPI on all partitions
-        ec['dependencies'] = [d for d in ec['dependencies'] if 'libfabric' not in d]
-        ec.log.info("[parse hook] Removed libfabric from dependency list")
-
-    if ec.name == 'Gurobi':
-        # use centrally installed Gurobi license file, and don't copy to installdir
-        ec['license_file'] = '/apps/brussel/licenses/gurobi/gurobi.lic'
-        ec.log.info(f"[parse hook] Set parameter license_file: {ec['license_file']}")
-        ec['copy_license_file'] = False
-        ec.log.info(f"[parse hook] Set parameter copy_license_file: {ec['copy_license_file']}")
-
-    if ec.name == 'MATLAB':
-        ec['license_file'] = '/apps/brussel/licenses/matlab/network.lic'
-        ec.log.info(f"[parse hook] Set parameter license_file: {ec['license_file']}")
-        # replace copy of license file in install dir with link to original license
-        ec['postinstallcmds'] = [f'ln -sfb {ec["license_file"]} %(installdir)s/licenses/']
-        ec.log.info(f"[parse hook] Set parameter postinstallcmds: {ec['postinstallcmds']}")
-
-    if ec.name in SOFTWARE_GROUPS:
-        ec['group'] = SOFTWARE_GROUPS[ec.name]
+    software_group = SOFTWARE_GROUPS.get(ec.name)
+    if software_group:
+        ec['group'] = software_group
         ec.log.info(f"[parse hook] Set parameter group: {ec['group']}")
 
     # set optarch for intel compilers on AMD nodes
-    optarchs_intel = {
-        'zen2': 'march=core-avx2',
-        # common-avx512 gives test failure for scipy
-        # see https://github.com/easybuilders/easybuild-easyconfigs/pull/18875
-        'zen4': 'march=rocketlake',
-    }
-    if LOCAL_ARCH in optarchs_intel and ec.toolchain.name in ['intel-compilers', 'iimpi', 'iimkl', 'intel']:
+    if LOCAL_ARCH in OPTARCHS_INTEL and ec.toolchain.name in INTEL_TOOLCHAINS:
         optarch = ec.toolchain.options.get('optarch')
         # only set if not set in the easyconfig or if set to default value (i.e. True)
         if not optarch or optarch is True:
-            ec.toolchain.options['optarch'] = optarchs_intel[LOCAL_ARCH]
+            ec.toolchain.options['optarch'] = OPTARCHS_INTEL[LOCAL_ARCH]
             ec.log.info(f"[parse hook] Set optarch in parameter toolchainopts: {ec.toolchain.options['optarch']}")
 
     # skip installation of CUDA software in non-GPU architectures, only create module file
@@ -159,8 +205,10 @@ def pre_fetch_hook(self):
     lock_dir = os.path.join(source_path, '.locks')
     mkdir(lock_dir, parents=True)
 
+    # poll the lock with exponential backoff, starting fast to catch short fetches
     wait_time = 0
-    wait_interval = 60
+    wait_interval = 1
+    max_interval = 60
     wait_limit = 3600
 
     lock = Lock(os.path.join(lock_dir, lock_name), lifetime=wait_limit, default_timeout=1)
@@ -178,10 +226,13 @@ def pre_fetch_hook(self):
                 error_msg = "[pre-fetch hook] Maximum wait time for lock %s to be released reached: %s sec >= %s sec"
                 raise EasyBuildError(error_msg, lock.lockfile, wait_time, wait_limit) from err
 
-            msg = "[pre-fetch hook] Lock %s held by another build, waiting %d seconds..."
-            self.log.debug(msg, lock.lockfile, wait_interval)
-            time.sleep(wait_interval)
-            wait_time += wait_interval
+            # add some jitter to avoid waking up all waiting builds at once
+            wait_sleep = wait_interval + random.uniform(0, wait_interval * 0.25)
+            msg = "[pre-fetch hook] Lock %s held by another build, waiting %.1f seconds..."
+            self.log.debug(msg, lock.lockfile, wait_sleep)
+            time.sleep(wait_sleep)
+            wait_time += wait_sleep
+            wait_interval = min(wait_interval * 2, max_interval)
 
 
 def post_fetch_hook(self):
@@ -206,13 +257,19 @@ def pre_configure_hook(self, *args, **kwargs):  # pylint: disable=unused-argumen
     if self.name == 'PMIx':
         self.log.info("[pre-configure hook] Enable munge support")
         self.cfg.update('configopts', "--with-munge")
-        if LooseVersion(self.version) >= LooseVersion('2'):
+        if LooseVersion(self.version) >= '2':
             self.log.info("[pre-configure hook] Disable per-user configuration")
             self.cfg.update('configopts', "--disable-per-user-config-files")
 
     # InfiniBand support:
     if self.name in IB_MODULE_SOFTWARE:
-        ec_param = IB_MODULE_SOFTWARE[self.name][0]
+        # IB settings of this arch
+        if LOCAL_ARCH_SUFFIX == IB_MODULE_SUFFIX:
+            self.log.info("[pre-configure hook] Enabling verbs in %s", self.name)
+            ec_param, ib_opt = IB_MODULE_OPTS_IB[self.name]
+        else:
+            self.log.info("[pre-configure hook] Disabling verbs in %s", self.name)
+            ec_param, ib_opt = IB_MODULE_OPTS_NOIB[self.name]
 
         # convert any non-list parameters to a list
         if ec_param == 'configopts':
@@ -221,16 +278,9 @@ def pre_configure_hook(self, *args, **kwargs):  # pylint: disable=unused-argumen
             ec_config = self.cfg[ec_param]
 
         # clean any settings about IB
-        ib_free_config = [opt for opt in ec_config if not any(mark in opt for mark in IB_OPT_MARK)]
+        ib_free_config = [opt for opt in ec_config if not IB_OPT_MARK_REGEX.search(opt)]
 
         # update IB settings
-        if LOCAL_ARCH_SUFFIX == IB_MODULE_SUFFIX:
-            self.log.info("[pre-configure hook] Enabling verbs in %s", self.name)
-            ib_opt = IB_MODULE_SOFTWARE[self.name][1]
-        else:
-            self.log.info("[pre-configure hook] Disabling verbs in %s", self.name)
-            ib_opt = IB_MODULE_SOFTWARE[self.name][2]
-
         ib_config = ib_free_config + [ib_opt]
 
         # consolidate changes
@@ -242,109 +292,122 @@ def pre_configure_hook(self, *args, **kwargs):  # pylint: disable=unused-argumen
         self.log.info("[pre-configure hook] Updated '%s': %s", ec_param, self.cfg[ec_param])
 
 
-def pre_module_hook(self, *args, **kwargs):  # pylint: disable=unused-argument
-    """Hook at pre-module level to alter module files"""
+##########################
+# ------ MPI ----------- #
+##########################
 
-    # Must be done this way, updating self.cfg['modextravars']
-    # directly doesn't work due to templating.
-    en_templ = self.cfg.enable_templating
-    self.cfg.enable_templating = False
+def module_openmpi(self):
+    """Alter the module file of OpenMPI"""
+
+    # set MPI communication type in Slurm (default is none)
+    # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/4706
+    slurm_mpi_type = None
+    ompi_version = LooseVersion(self.version)
+    if ompi_version >= '3.0.0':
+        slurm_mpi_type = 'pmix'
+    elif ompi_version >= '2.1.0':
+        slurm_mpi_type = 'pmi2'
 
-    ##########################
-    # ------ MPI ----------- #
-    ##########################
-
-    if self.name == 'OpenMPI':
-        # set MPI communication type in Slurm (default is none)
-        # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/4706
-        slurm_mpi_type = None
-        if LooseVersion(self.version) >= '3.0.0':
-            slurm_mpi_type = 'pmix'
-        elif LooseVersion(self.version) >= '2.1.0':
-            slurm_mpi_type = 'pmi2'
-
-        if slurm_mpi_type:
-            self.log.info("[pre-module hook] Set Slurm MPI type to: %s", slurm_mpi_type)
-            self.cfg['modextravars'].update({'SLURM_MPI_TYPE': slurm_mpi_type})
-
-    if self.name == 'impi':
-        # - use PMI1/2 implementation from Slurm
-        # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/7192
-        # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/7588
-
-        # use PMI1 by default (works with older versions)
-        slurm_mpi_type = None
-        intel_mpi = {
-            'pmi_var': 'I_MPI_PMI2',
-            'pmi_set': 'no',
-            'pmi_lib': '/usr/lib64/slurmpmi/libpmi.so',
-        }
-
-        if LooseVersion(self.version) >= '2019.7':
-            # Intel MPI v2019 supports PMI2 with I_MPI_PMI=pmi2, but it only atually works since v2019.7
-            # see https://bugs.schedmd.com/show_bug.cgi?id=6727
-            intel_mpi['pmi_var'] = 'I_MPI_PMI'
-            intel_mpi['pmi_set'] = 'pmi2'
-            intel_mpi['pmi_lib'] = '/usr/lib64/slurmpmi/libpmi2.so'
-            slurm_mpi_type = 'pmi2'
-        elif LooseVersion(self.version) >= '2019.0':
-            # use PMI1 with this buggy releases of Intel MPI
-            # see https://bugs.schedmd.com/show_bug.cgi?id=6727
-            intel_mpi['pmi_var'] = 'I_MPI_PMI'
-            intel_mpi['pmi_set'] = 'pmi1'
-        elif LooseVersion(self.version) >= '2018.0':
-            # Intel MPI v2018 supports PMI2 with I_MPI_PMI2=yes
-            intel_mpi['pmi_set'] = 'yes'
-            intel_mpi['pmi_lib'] = '/usr/lib64/slurmpmi/libpmi2.so'
-            slurm_mpi_type = 'pmi2'
-
-        self.log.info("[pre-module hook] Set MPI bootstrap for Slurm")
-        self.cfg['modluafooter'] = """
+    if slurm_mpi_type:
+        self.log.info("[pre-module hook] Set Slurm MPI type to: %s", slurm_mpi_type)
+        self.cfg['modextravars'].update({'SLURM_MPI_TYPE': slurm_mpi_type})
+
+
+INTEL_MPI_MOD_FOOTER = """
 if ( os.getenv("SLURM_JOB_ID") ) then
     setenv("I_MPI_HYDRA_BOOTSTRAP", "slurm")
     setenv("I_MPI_PIN_RESPECT_CPUSET", "0")
     setenv("I_MPI_PMI_LIBRARY", "%(pmi_lib)s")
     setenv("%(pmi_var)s", "%(pmi_set)s")
 end
-""" % intel_mpi
-
-        # set MPI communication type in Slurm (default is none, which works for PMI1)
-        # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/7192
-        # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/7588
-        if slurm_mpi_type:
-            self.log.info("[pre-module hook] Set Slurm MPI type to: %s", slurm_mpi_type)
-            self.cfg['modextravars'].update({'SLURM_MPI_TYPE': slurm_mpi_type})
-
-    ##########################
-    # ------ TUNING -------- #
-    ##########################
-
-    # set the maximum heap memory for Java applications to 80% of memory allocated to the job
-    # more info: https://projects.cc.vub.ac.be/issues/2940
-    if self.name == 'Java':
-        self.log.info("[pre-module hook] Set max heap memory in Java module")
-        self.cfg['modluafooter'] = """
+"""
+
+
+def module_impi(self):
+    """Alter the module file of Intel MPI"""
+
+    # - use PMI1/2 implementation from Slurm
+    # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/7192
+    # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/7588
+
+    # use PMI1 by default (works with older versions)
+    slurm_mpi_type = None
+    intel_mpi = {
+        'pmi_var': 'I_MPI_PMI2',
+        'pmi_set': 'no',
+        'pmi_lib': '/usr/lib64/slurmpmi/libpmi.so',
+    }
+
+    impi_version = LooseVersion(self.version)
+    if impi_version >= '2019.7':
+        # Intel MPI v2019 supports PMI2 with I_MPI_PMI=pmi2, but it only atually works since v2019.7
+        # see https://bugs.schedmd.com/show_bug.cgi?id=6727
+        intel_mpi['pmi_var'] = 'I_MPI_PMI'
+        intel_mpi['pmi_set'] = 'pmi2'
+        intel_mpi['pmi_lib'] = '/usr/lib64/slurmpmi/libpmi2.so'
+        slurm_mpi_type = 'pmi2'
+    elif impi_version >= '2019.0':
+        # use PMI1 with this buggy releases of Intel MPI
+        # see https://bugs.schedmd.com/show_bug.cgi?id=6727
+        intel_mpi['pmi_var'] = 'I_MPI_PMI'
+        intel_mpi['pmi_set'] = 'pmi1'
+    elif impi_version >= '2018.0':
+        # Intel MPI v2018 supports PMI2 with I_MPI_PMI2=yes
+        intel_mpi['pmi_set'] = 'yes'
+        intel_mpi['pmi_lib'] = '/usr/lib64/slurmpmi/libpmi2.so'
+        slurm_mpi_type = 'pmi2'
+
+    self.log.info("[pre-module hook] Set MPI bootstrap for Slurm")
+    self.cfg['modluafooter'] = INTEL_MPI_MOD_FOOTER % intel_mpi
+
+    # set MPI communication type in Slurm (default is none, which works for PMI1)
+    # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/7192
+    # more info: https://dev.azure.com/VUB-ICT/Directie%20ICT/_workitems/edit/7588
+    if slurm_mpi_type:
+        self.log.info("[pre-module hook] Set Slurm MPI type to: %s", slurm_mpi_type)
+        self.cfg['modextravars'].update({'SLURM_MPI_TYPE': slurm_mpi_type})
+
+
+##########################
+# ------ TUNING -------- #
+##########################
+
+# set the maximum heap memory for Java applications to 80% of memory allocated to the job
+# more info: https://projects.cc.vub.ac.be/issues/2940
+JAVA_MOD_FOOTER = """
 local mem = get_avail_memory()
 if mem then
     setenv("JAVA_TOOL_OPTIONS",  "-Xmx" .. math.floor(mem*0.8))
 end
 """
 
-    # set MATLAB Runtime Component Cache folder to a local temp dir
-    # this cache directory lies in $HOME by default, which cause binaries compiled with MCC to hang
-    if self.name == 'MATLAB':
-        self.log.info("[pre-module hook] Set MATLAB Runtime Component Cache folder")
-        self.cfg['modluafooter'] = """
+# set MATLAB Runtime Component Cache folder to a local temp dir
+# this cache directory lies in $HOME by default, which cause binaries compiled with MCC to hang
+MATLAB_MOD_FOOTER = """
 setenv("MCR_CACHE_ROOT", os.getenv("TMPDIR") or pathJoin("/tmp", os.getenv("USER")))
 """
 
-    ##########################
-    # ------ LICENSES ------ #
-    ##########################
 
-    # set COMSOL licenses
-    if self.name == 'COMSOL':
-        self.cfg['modluafooter'] = """
+def module_java(self):
+    """Alter the module file of Java"""
+
+    self.log.info("[pre-module hook] Set max heap memory in Java module")
+    self.cfg['modluafooter'] = JAVA_MOD_FOOTER
+
+
+def module_matlab(self):
+    """Alter the module file of MATLAB"""
+
+    self.log.info("[pre-module hook] Set MATLAB Runtime Component Cache folder")
+    self.cfg['modluafooter'] = MATLAB_MOD_FOOTER
+
+
+##########################
+# ------ LICENSES ------ #
+##########################
+
+# set COMSOL licenses
+COMSOL_MOD_FOOTER = """
 if userInGroup("bcomsol") then
     setenv("LMCOMSOL_LICENSE_FILE", "/apps/brussel/licenses/comsol/License.dat")
 elseif userInGroup("bcomsol_efremov") then
@@ -352,47 +415,98 @@ elseif userInGroup("bcomsol_efremov") then
 end
 """
 
+
+def module_comsol(self):
+    """Alter the module file of COMSOL"""
+
+    self.cfg['modluafooter'] = COMSOL_MOD_FOOTER
+
+
+def module_morfeo(self):
+    """Alter the module file of Morfeo"""
+
     # Morfeo license file
-    if self.name == 'Morfeo':
-        self.cfg['modextravars'].update({'CENAERO_LICENSE_FILE': '/apps/brussel/licenses/morfeo/license.lic'})
+    self.cfg['modextravars'].update({'CENAERO_LICENSE_FILE': '/apps/brussel/licenses/morfeo/license.lic'})
 
-    # ABAQUS license file
-    if self.name == 'ABAQUS':
-        self.cfg['modextravars'].update({'ABAQUSLM_LICENSE_FILE': '/apps/brussel/licenses/abaqus/license.lic'})
 
-    ##########################
-    # ------ DATABASES ----- #
-    ##########################
+def module_abaqus(self):
+    """Alter the module file of ABAQUS"""
+
+    # ABAQUS license file
+    self.cfg['modextravars'].update({'ABAQUSLM_LICENSE_FILE': '/apps/brussel/licenses/abaqus/license.lic'})
 
-    apps_with_dbs = ["AlphaFold", "BUSCO", "ColabFold", "OpenFold"]
 
-    if self.name in apps_with_dbs:
-        self.cfg['modloadmsg'] = "%(name)s databases are located in /databases/bio/%(namelower)s-%(version)s"
+##########################
+# ------ DATABASES ----- #
+##########################
 
-    if self.name == 'BUSCO':
-        if LooseVersion(self.version) >= '5.0.0':
-            self.cfg['modloadmsg'] += """
+APPS_WITH_DBS = ["AlphaFold", "BUSCO", "ColabFold", "OpenFold"]
+BUSCO_MOD_LOADMSG = """
 Use local DBs with command: `busco --offline --download_path /databases/bio/BUSCO-5 ...`
 """
 
-    if self.name == 'AlphaFold':
-        self.cfg['modextravars'] = {
-            'ALPHAFOLD_DATA_DIR': '/databases/bio/%(namelower)s-%(version)s',
-        }
 
-    # add links to our documentation for software covered in
-    # https://hpc.vub.be/docs/software/usecases/
-    doc_url = 'https://hpc.vub.be/docs/software/usecases/'
-    doc_app = ['MATLAB', 'R', 'Gaussian', 'GaussView', 'matplotlib', ('CESM-deps', 'cesm-cime'), 'GAP', 'Mathematica',
-               'Stata', 'GROMACS', 'CP2K', 'PyTorch', 'ORCA', 'SRA-Toolkit', 'AlphaFold', 'OpenFold', 'GAMESS-US']
+def module_busco(self):
+    """Alter the module file of BUSCO"""
+
+    if LooseVersion(self.version) >= '5.0.0':
+        self.cfg['modloadmsg'] += BUSCO_MOD_LOADMSG
+
+
+def module_alphafold(self):
+    """Alter the module file of AlphaFold"""
+
+    self.cfg['modextravars'] = {
+        'ALPHAFOLD_DATA_DIR': '/databases/bio/%(namelower)s-%(version)s',
+    }
+
+
+# module footer of CUDA software in non-GPU archs
+CUDA_DUMMY_MOD_FOOTER = """
+if mode() == "load" and not os.getenv("BUILD_TOOLS_LOAD_DUMMY_MODULES") then
+    LmodError([[
+This module is only available on nodes with a GPU.
+Jobs can request GPUs with the command 'srun --gpus-per-node=1' or 'sbatch --gpus-per-node=1'.
+
+More information in the VUB-HPC docs:
+https://hpc.vub.be/docs/job-submission/gpu-job-types/#gpu-jobs
+    ]])
+end"""
+
+# software specific changes in pre_module_hook
+MODULE_SOFTWARE = {
+    'OpenMPI': module_openmpi,
+    'impi': module_impi,
+    'Java': module_java,
+    'MATLAB': module_matlab,
+    'COMSOL': module_comsol,
+    'Morfeo': module_morfeo,
+    'ABAQUS': module_abaqus,
+    'BUSCO': module_busco,
+    'AlphaFold': module_alphafold,
+}
+
+
+def pre_module_hook(self, *args, **kwargs):  # pylint: disable=unused-argument
+    """Hook at pre-module level to alter module files"""
+
+    # Must be done this way, updating self.cfg['modextravars']
+    # directly doesn't work due to templating.
+    en_templ = self.cfg.enable_templating
+    self.cfg.enable_templating = False
+
+    # location of databases, extended by software specific messages
+    if self.name in APPS_WITH_DBS:
+        self.cfg['modloadmsg'] = "%(name)s databases are located in /databases/bio/%(namelower)s-%(version)s"
 
-    # generate links for documented apps
-    app_anchors = [(app, app.lower()) if isinstance(app, str) else app for app in doc_app]
-    app_links = {app: '#'.join([doc_url, anchor]) for (app, anchor) in app_anchors}
+    module_software = MODULE_SOFTWARE.get(self.name)
+    if module_software:
+        module_software(self)
 
-    if self.name in app_links:
+    # add links to our documentation
+    if self.name in DOC_APP_LINKS:
         # update usage section
-        usage_info = {'app': self.name, 'link': app_links[self.name]}
+        usage_info = {'app': self.name, 'link': DOC_APP_LINKS[self.name]}
         usage_msg = """
 Specific usage instructions for %(app)s are available in VUB-HPC documentation:
 %(link)s
@@ -411,16 +525,7 @@ Specific usage instructions for %(app)s are available in VUB-HPC documentation:
     is_cuda_software = 'CUDA' in self.name or 'CUDA' in self.cfg['versionsuffix']
     if is_cuda_software and LOCAL_ARCH_FULL not in GPU_ARCHS:
         self.log.info("[pre-module hook] Creating dummy module for CUDA modules on non-GPU nodes")
-        self.cfg['modluafooter'] = """
-if mode() == "load" and not os.getenv("BUILD_TOOLS_LOAD_DUMMY_MODULES") then
-    LmodError([[
-This module is only available on nodes with a GPU.
-Jobs can request GPUs with the command 'srun --gpus-per-node=1' or 'sbatch --gpus-per-node=1'.
-
-More information in the VUB-HPC docs:
-https://hpc.vub.be/docs/job-submission/gpu-job-types/#gpu-jobs
-    ]])
-end"""
+        self.cfg['modluafooter'] = CUDA_DUMMY_MOD_FOOTER
 
     ############################
     # ------ FINALIZE -------- #
@@ -17,6 +17,8 @@ Parameters for installing IB/non-IB modules
 @author: Samuel Moors (Vrije Universiteit Brussel)
 """
 
+import re
+
 # software with IB and non-IB modules
 # tuple with name of easyconfig parameter and its options to enable/disable IB
 IB_MODULE_SOFTWARE = {
@@ -25,8 +27,12 @@ IB_MODULE_SOFTWARE = {
     'libfabric': ('configopts', '--enable-verbs=yes', '--enable-verbs=no'),
     'PyTorch': ('custom_opts', 'USE_IBVERBS=1', 'USE_IBVERBS=0'),
 }
+# tuples with name of easyconfig parameter and its option in IB and non-IB archs
+IB_MODULE_OPTS_IB = {name: (param, ib_opt) for (name, (param, ib_opt, _)) in IB_MODULE_SOFTWARE.items()}
+IB_MODULE_OPTS_NOIB = {name: (param, noib_opt) for (name, (param, _, noib_opt)) in IB_MODULE_SOFTWARE.items()}
 
 IB_OPT_MARK = ['verbs', 'VERBS', 'rdma']
+IB_OPT_MARK_REGEX = re.compile('|'.join(re.escape(mark) for mark in IB_OPT_MARK))
 
 # version suffix of IB archs and modules
 IB_MODULE_SUFFIX = '-ib'
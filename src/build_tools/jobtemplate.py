@@ -18,60 +18,58 @@ Job template to submit build jobs
 @author: Alex Domingo (Vrije Universiteit Brussel)
 """
 
-from string import Template
-
+# job script template, formatted with str.format
+# literal braces of shell variables are doubled
 BUILD_JOB = """#!/bin/bash -l
-#SBATCH --job-name=${job_name}
+#SBATCH --job-name={job_name}
 #SBATCH --output="%x-%j.out"
 #SBATCH --error="%x-%j.err"
-#SBATCH --time=${walltime}
-#SBATCH --nodes=${nodes}
-#SBATCH --ntasks=${tasks}
-#SBATCH --gpus-per-node=${gpus}
-#SBATCH --partition=${partition}
+#SBATCH --time={walltime}
+#SBATCH --nodes={nodes}
+#SBATCH --ntasks={tasks}
+#SBATCH --gpus-per-node={gpus}
+#SBATCH --partition={partition}
 
-if [ -z $$PREFIX_EB ]; then
+if [ -z $PREFIX_EB ]; then
   echo 'PREFIX_EB is not set!'
   exit 1
 fi
 
 # set environment
 export BUILD_TOOLS_LOAD_DUMMY_MODULES=1
-export BUILD_TOOLS_RUN_LMOD_CACHE=${lmod_cache}
-export LANG=${langcode}
-export PATH=$$PREFIX_EB/easybuild-framework:$$PATH
-export PYTHONPATH=$$PREFIX_EB/easybuild-easyconfigs:$$PREFIX_EB/easybuild-easyblocks:$$PREFIX_EB/easybuild-framework:$$PREFIX_EB/vsc-base/lib
+export BUILD_TOOLS_RUN_LMOD_CACHE={lmod_cache}
+export LANG={langcode}
+export PATH=$PREFIX_EB/easybuild-framework:$PATH
+export PYTHONPATH=$PREFIX_EB/easybuild-easyconfigs:$PREFIX_EB/easybuild-easyblocks:$PREFIX_EB/easybuild-framework:$PREFIX_EB/vsc-base/lib
 
 # make build directory
-if [ -z $$SLURM_JOB_ID ]; then
-    export TMPDIR=${tmp}/$$USER/
+if [ -z $SLURM_JOB_ID ]; then
+    export TMPDIR={tmp}/$USER/
 fi
-mkdir -p $$TMPDIR
-mkdir -p ${eb_buildpath}
+mkdir -p $TMPDIR
+mkdir -p {eb_buildpath}
 
 # update MODULEPATH for cross-compilations
-if [ "${target_arch}" != "$$VSC_ARCH_LOCAL" ]; then
-    moddir="${eb_installpath}/modules"
+if [ "{target_arch}" != "$VSC_ARCH_LOCAL" ]; then
+    moddir="{eb_installpath}/modules"
     # use modules from target arch and toolchain generation
-    CC_MODULEPATH=$${moddir}/${tc_gen}/all
+    CC_MODULEPATH=${{moddir}}/{tc_gen}/all
     # also add last 3 years of modules in case out-of-toolchain deps are needed
-    for modpath in $$(ls -1dr $${moddir}/*/all | head -n 6); do
-        CC_MODULEPATH="$$CC_MODULEPATH:$$modpath"
+    for modpath in $(ls -1dr ${{moddir}}/*/all | head -n 6); do
+        CC_MODULEPATH="$CC_MODULEPATH:$modpath"
     done
-    export MODULEPATH=$$CC_MODULEPATH
+    export MODULEPATH=$CC_MODULEPATH
 fi
 
-${pre_eb_options} eb ${eb_options}
+{pre_eb_options} eb {eb_options}
 
-if [ $$? -ne 0 ]; then
-    if [ -n "$$SLURM_JOB_ID" ]; then
-        rm -rf ${eb_buildpath}
+if [ $? -ne 0 ]; then
+    if [ -n "$SLURM_JOB_ID" ]; then
+        rm -rf {eb_buildpath}
     fi
     exit 1
 fi
 
-${postinstall}
+{postinstall}
 
 """  # noqa
-
-BuildJob = Template(BUILD_JOB)
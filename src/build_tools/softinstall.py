@@ -20,16 +20,19 @@ Functions related to the software installation
 
 import os
 import re
+import shlex
 
 from vsc.utils import fancylogger
 from vsc.utils.run import RunNoShell, RunLoopStdout
 
 from build_tools.filetools import write_tempfile
-from build_tools.jobtemplate import BuildJob
+from build_tools.jobtemplate import BUILD_JOB
 
 logger = fancylogger.getLogger()
 
 TOOLCHAIN_FORMAT = r"20[1-2][0-9][ab]"
+TOOLCHAIN_REGEX = re.compile(TOOLCHAIN_FORMAT)
+TOOLCHAIN_FULL_REGEX = re.compile('^' + TOOLCHAIN_FORMAT + '$')
 
 SUBTOOLCHAINS = {
     '2023a': ['GCCcore-12.3.0', 'GCC-12.3.0', 'intel-compilers-2023.1.0'],
@@ -55,20 +58,21 @@ def set_toolchain_generation(easyconfig, user_toolchain=False):
     toolchain_generation = None
 
     if user_toolchain:
-        if re.match('^' + TOOLCHAIN_FORMAT + '$', user_toolchain):
+        if TOOLCHAIN_FULL_REGEX.match(user_toolchain):
             toolchain_generation = user_toolchain
         else:
             logger.error("Specified toolchain generation is not valid: %s", user_toolchain)
             return False
     else:
-        found_tc = re.findall(TOOLCHAIN_FORMAT, easyconfig)
+        found_tc = TOOLCHAIN_REGEX.findall(easyconfig)
         found_tc = set(found_tc)  # remove duplicates (multiple toolchain labels might present in long paths)
         if len(found_tc) == 1:
             toolchain_generation = found_tc.pop()
         else:
             # Try to determine toolchain generation based on sub-toolchain
             for main_tc, sub_tc in SUBTOOLCHAINS.items():
-                if any([re.search(tc, easyconfig) for tc in sub_tc]):
+                # sub-toolchains are plain strings, stop at first match
+                if any(tc in easyconfig for tc in sub_tc):
                     toolchain_generation = main_tc
                     break
 
@@ -77,15 +81,19 @@ def set_toolchain_generation(easyconfig, user_toolchain=False):
     return toolchain_generation
 
 
-def mk_job_name(easyconfig, host_arch, target_arch=None):
+def mk_job_name(easyconfig, host_arch, target_arch=None, mod_name=None):
     """
     Return name for job script as {easyconfig name}-{host_arch}-{target_arch}
     :param easyconfig: path to easyconfig
     :param host_arch: name of host architecture
     :param host_arch: name of target architecture
+    :param mod_name: full module name of the easyconfig, replaces the easyconfig name if known
     """
 
-    job_name = re.sub('.eb$', '', os.path.basename(easyconfig))
+    if mod_name:
+        job_name = mod_name.replace('/', '-')
+    else:
+        job_name = re.sub('.eb$', '', os.path.basename(easyconfig))
 
     if host_arch:
         job_name += '-%s' % host_arch
@@ -96,6 +104,22 @@ def mk_job_name(easyconfig, host_arch, target_arch=None):
     return job_name
 
 
+def shell_join(args):
+    """
+    Join list of command line arguments into a string for job scripts, quoting each argument as needed
+    Arguments with environment variables are double quoted to be expanded at runtime
+    :param args: list of command line arguments
+    """
+    quoted_args = []
+    for arg in args:
+        if '$' in arg:
+            quoted_args.append('"%s"' % re.sub(r'(["\\`])', r'\\\1', arg))
+        else:
+            quoted_args.append(shlex.quote(arg))
+
+    return ' '.join(quoted_args)
+
+
 def submit_job_script(job_file, sub_options='', cluster='hydra', local_exec=False, dry_run=False):
     """
     Execute sbatch command to submit job script to target cluster
@@ -133,10 +157,14 @@ def submit_build_job(job_options, keep_job=False, **kwargs):
     """
     Generate job script from BUILD_JOB template and submit it with Slurm to target cluster
     :param job_options: dict with options to pass to job template
+                        eb_options can be a list of arguments or a string formatted for the shell
     :param keep_job: do not delete the job script file
     """
 
-    job_script = BuildJob.substitute(job_options)
+    if not isinstance(job_options['eb_options'], str):
+        job_options = dict(job_options, eb_options=shell_join(job_options['eb_options']))
+
+    job_script = BUILD_JOB.format_map(job_options)
     job_file = write_tempfile(job_script)
     logger.debug("Job script written to %s", job_file)
 
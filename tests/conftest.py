@@ -19,6 +19,8 @@ Unit tests configuration file
 import os
 import pytest
 
+from build_tools import eccache
+
 
 def pytest_addoption(parser):
     parser.addoption(
@@ -26,22 +28,33 @@ def pytest_addoption(parser):
 
 
 @pytest.fixture
-def get_module_cmd(request):
+def rootdir():
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def get_module_cmd(request, monkeypatch, rootdir):
     fromsource = request.config.getoption('fromsource')
     if fromsource:
-        return '../bin/get_module_from_easyconfig.py'
+        # helper script imports build_tools from the source tree
+        pythonpath = [os.path.join(rootdir, '..', 'src'), os.getenv('PYTHONPATH')]
+        monkeypatch.setenv('PYTHONPATH', os.pathsep.join(filter(None, pythonpath)))
+        return os.path.join(rootdir, '..', 'bin', 'get_module_from_easyconfig.py')
     else:
         return 'get_module_from_easyconfig.py'
 
 
 @pytest.fixture
-def rootdir():
-    return os.path.dirname(os.path.abspath(__file__))
+def inputdir(rootdir):
+    return os.path.join(rootdir, 'input')
 
 
 @pytest.fixture
-def inputdir(rootdir):
-    return os.path.join(rootdir, 'input')
+def tmp_ec_cache(monkeypatch, tmpdir):
+    monkeypatch.setattr(eccache, 'EC_CACHE_DIR', tmpdir.strpath)
+    monkeypatch.setattr(eccache, 'EC_CACHE_FILE', os.path.join(tmpdir.strpath, 'ec_parse.db'))
+    # helper scripts in subprocesses use a cache under XDG_CACHE_HOME
+    monkeypatch.setenv('XDG_CACHE_HOME', tmpdir.strpath)
 
 
 def realpath_apps_brussel(path):
@@ -0,0 +1,175 @@
+#
+# Copyright 2017-2024 Vrije Universiteit Brussel
+# All rights reserved.
+#
+# This file is part of build_tools (https://github.com/vub-hpc/build_tools),
+# originally created by the HPC team of Vrije Universiteit Brussel (https://hpc.vub.be),
+# with support of Vrije Universiteit Brussel (https://www.vub.be),
+# the Flemish Supercomputer Centre (VSC) (https://www.vscentrum.be),
+# the Flemish Research Foundation (FWO) (http://www.fwo.be/en)
+# and the Department of Economy, Science and Innovation (EWI) (http://www.ewi-vlaanderen.be/en).
+#
+##
+"""
+Unit tests for build_tools.eccache
+
+@author: Alex Domingo (Vrije Universiteit Brussel)
+"""
+
+import os
+import shutil
+import time
+
+import pytest
+
+from build_tools import eccache
+
+
+@pytest.fixture
+def mock_parse(monkeypatch):
+    parsed = []
+
+    def mock_parse_easyconfig_files(easyconfigs, eb_args=None):
+        parsed.extend(easyconfigs)
+        metadata = []
+        for easyconfig in easyconfigs:
+            name, version = os.path.basename(easyconfig)[:-3].split('-', 1)
+            metadata.append({'full_mod_name': f'{name}/{version}', 'moduleclass': 'lib'})
+        return metadata
+
+    monkeypatch.setattr(eccache, 'parse_easyconfig_files', mock_parse_easyconfig_files)
+    monkeypatch.setattr(eccache, 'quick_parse_easyconfig', lambda easyconfig, mns=None: None)
+
+    return parsed
+
+
+def test_get_full_mod_name_cached(inputdir, tmpdir, tmp_ec_cache, mock_parse):
+    easyconfig = os.path.join(inputdir, 'zlib-1.2.11.eb')
+    assert eccache.get_full_mod_name(easyconfig) == 'zlib/1.2.11'
+
+    # copies of the same easyconfig are found in the cache
+    ec_copy = os.path.join(tmpdir.strpath, 'zlib-copy.eb')
+    shutil.copyfile(easyconfig, ec_copy)
+    assert eccache.get_full_mod_name(ec_copy) == 'zlib/1.2.11'
+
+    assert mock_parse == [easyconfig]
+
+
+def test_get_ecs_metadata_order(inputdir, tmpdir, tmp_ec_cache, mock_parse):
+    zlib_ec = os.path.join(inputdir, 'zlib-1.2.11.eb')
+    bzip2_ec = os.path.join(tmpdir.strpath, 'bzip2-1.0.8.eb')
+    with open(bzip2_ec, 'w') as ec:
+        ec.write("name = 'bzip2'\nversion = '1.0.8'\n")
+
+    # cached and missing easyconfigs keep the order of the input
+    eccache.get_full_mod_name(zlib_ec)
+    metadata = eccache.get_ecs_metadata([bzip2_ec, zlib_ec])
+
+    assert [ec['full_mod_name'] for ec in metadata] == ['bzip2/1.0.8', 'zlib/1.2.11']
+    assert mock_parse == [zlib_ec, bzip2_ec]
+
+
+def test_ec_cache_corrupt_entry(inputdir, tmp_ec_cache, mock_parse):
+    easyconfig = os.path.join(inputdir, 'zlib-1.2.11.eb')
+    key = eccache.ec_cache_key(easyconfig)
+    with eccache.open_ec_cache() as cache:
+        cache.dict[key.encode('utf-8')] = b'truncated'
+
+    # unreadable entries are parsed again and replaced
+    assert eccache.get_full_mod_name(easyconfig) == 'zlib/1.2.11'
+    assert mock_parse == [easyconfig]
+    with eccache.open_ec_cache() as cache:
+        assert cache[key][1]['full_mod_name'] == 'zlib/1.2.11'
+
+
+def test_prune_ec_cache(tmp_ec_cache, monkeypatch):
+    monkeypatch.setattr(eccache, 'EC_CACHE_MAX_ENTRIES', 2)
+    with eccache.open_ec_cache() as cache:
+        cache['expired'] = (time.time() - eccache.EC_CACHE_EXPIRY - 1, {})
+        cache['invalid'] = {'full_mod_name': 'zlib/1.2.11'}
+        for idx in range(3):
+            cache[f'entry{idx}'] = (time.time() + idx, {})
+        eccache.prune_ec_cache(cache)
+
+        assert sorted(cache.keys()) == ['entry1', 'entry2']
+
+
+def test_parse_easyconfig_files_eb_args(tmpdir, tmp_ec_cache, monkeypatch):
+    # site easyblocks are only known to EasyBuild with the options of the build jobs
+    easyconfig = os.path.join(tmpdir.strpath, 'FooBar-1.0.eb')
+    with open(easyconfig, 'w') as ec:
+        ec.write(
+            "easyblock = 'EB_FooBarSiteVub'\nname = 'FooBar'\nversion = '1.0'\n"
+            "versionsuffix = '-%(version_major)s'\ntoolchain = SYSTEM\n"
+        )
+    eb_args = ['--include-easyblocks=/site-vub/easyblocks/*/*.py', '--robot-paths=/site-vub/easyconfigs']
+
+    eb_configs = []
+    parsed_ec = {'spec': easyconfig, 'full_mod_name': 'FooBar/1.0-1', 'ec': {'moduleclass': 'tools'}}
+    monkeypatch.setenv('EASYBUILD_IGNORE_INDEX', '1')
+    monkeypatch.setattr('easybuild.tools.options.set_up_configuration', lambda args, silent: eb_configs.append(args))
+    monkeypatch.setattr('easybuild.framework.easyconfig.tools.parse_easyconfigs', lambda paths: ([parsed_ec], None))
+
+    assert eccache.get_full_mod_name(easyconfig, use_easybuild=False) is None
+    assert eccache.get_ecs_metadata([easyconfig], eb_args=eb_args)[0]['full_mod_name'] == 'FooBar/1.0-1'
+    assert eb_configs == [eb_args]
+
+
+@pytest.mark.parametrize(
+    'test_ec',
+    [
+        ("name = 'zlib'\nversion = '1.2.11'\ntoolchain = SYSTEM\nmoduleclass = 'lib'\n", 'zlib/1.2.11'),
+        (
+            "name = 'Python'\nversion = '3.10.4'  # latest\nversionsuffix = '-bare'\n"
+            "toolchain = {\n    'name': 'GCCcore',\n    'version': '11.3.0',\n}\n",
+            'Python/3.10.4-GCCcore-11.3.0-bare',
+        ),
+        ("name = 'zlib'\nversion = '1.2.11'\n", None),
+        ("name = 'zlib'\nlocal_ver = '1.2.11'\nversion = local_ver\ntoolchain = SYSTEM\n", None),
+        ("name = 'PyYAML'\nversion = '6.0'\nversionsuffix = '-Python-%(pyver)s'\ntoolchain = SYSTEM\n", None),
+        ("name = 'zlib'\nversion = '1.2.11'\ntoolchain = SYSTEM\nhidden = True\n", None),
+        ("name = 'zlib'\nif True:\n    version = '1.2.11'\ntoolchain = SYSTEM\n", None),
+    ]
+)
+def test_quick_parse_easyconfig(tmpdir, test_ec):
+    ec_txt, full_mod_name = test_ec
+    easyconfig = os.path.join(tmpdir.strpath, 'test.eb')
+    with open(easyconfig, 'w') as ec:
+        ec.write(ec_txt)
+
+    metadata = eccache.quick_parse_easyconfig(easyconfig)
+
+    if full_mod_name:
+        assert metadata['full_mod_name'] == full_mod_name
+    else:
+        assert metadata is None
+
+
+def test_quick_parse_easyconfig_input(inputdir):
+    metadata = eccache.quick_parse_easyconfig(os.path.join(inputdir, 'zlib-1.2.11.eb'))
+
+    assert metadata['full_mod_name'] == 'zlib/1.2.11'
+    assert metadata['moduleclass'] == 'lib'
+
+
+def test_ec_cache_key_config(inputdir, tmpdir, monkeypatch):
+    easyconfig = os.path.join(inputdir, 'zlib-1.2.11.eb')
+    configfile = os.path.join(tmpdir.strpath, 'config.cfg')
+    with open(configfile, 'w') as cfg:
+        cfg.write("[config]\nmodule-naming-scheme = HierarchicalMNS\n")
+
+    monkeypatch.delenv('EASYBUILD_MODULE_NAMING_SCHEME', raising=False)
+    monkeypatch.setenv('EASYBUILD_CONFIGFILES', '')
+    default_key = eccache.ec_cache_key(easyconfig)
+    assert eccache.get_module_naming_scheme() == 'EasyBuildMNS'
+
+    # naming scheme set in configuration files changes the key and requires EasyBuild
+    monkeypatch.setenv('EASYBUILD_CONFIGFILES', configfile)
+    assert eccache.ec_cache_key(easyconfig) != default_key
+    assert eccache.get_module_naming_scheme() == 'HierarchicalMNS'
+    assert eccache.quick_parse_easyconfig(easyconfig) is None
+
+    # ignored configuration files are not considered
+    monkeypatch.setenv('EASYBUILD_IGNORECONFIGFILES', configfile)
+    assert eccache.ec_cache_key(easyconfig) == default_key
+    assert eccache.get_module_naming_scheme() == 'EasyBuildMNS'
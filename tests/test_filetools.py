@@ -18,7 +18,11 @@ author: Samuel Moors (Vrije Universiteit Brussel)
 """
 
 import os
+import shlex
 import shutil
+import sys
+
+from vsc.utils.run import RunNoShell
 
 from build_tools import filetools
 
@@ -40,6 +44,9 @@ def test_write_tempfile():
 
     assert tmp_file_contents == contents
 
+    tmp_file = filetools.write_tempfile(b'')
+    assert os.path.getsize(tmp_file) == 0
+
 
 def test_clean_append_new(tmpdir):
     modrc_path = os.path.join(tmpdir.strpath, '.modulerc.lua')
@@ -71,9 +78,38 @@ hide_version("GCCcore/4")
     assert modrc_text == ref_modrc_text
 
 
-def test_get_module(inputdir, get_module_cmd):
+def test_get_module(inputdir, tmp_ec_cache, get_module_cmd):
     easyconfig = os.path.join(inputdir, 'zlib-1.2.11.eb')
     _, module = filetools.get_module(easyconfig, cmd=get_module_cmd)
 
     assert module[0] == 'zlib'
     assert module[1] == '1.2.11'
+
+
+def test_get_module_easybuild(tmpdir, tmp_ec_cache):
+    # easyconfigs with dynamic definitions are passed to the helper command
+    easyconfig = os.path.join(tmpdir.strpath, 'zlib.eb')
+    with open(easyconfig, 'w') as ec:
+        ec.write("name = 'zlib'\nlocal_ver = '1.2.11'\nversion = local_ver\ntoolchain = SYSTEM\n")
+
+    # mock helper script that only knows the given easyconfig with the given EasyBuild options
+    eb_options = ['--include-easyblocks=/site-vub/easyblocks/*/*.py', '--robot-paths=/site-vub/easyconfigs']
+    helper = os.path.join(tmpdir.strpath, 'helper.py')
+    with open(helper, 'w') as script:
+        script.write(f"import sys\nif sys.argv[1:] == {eb_options + [easyconfig]!r}:\n    print('zlib/1.2.11')\n")
+
+    ec, module = filetools.get_module(easyconfig, cmd=f'{sys.executable} {helper}', eb_options=eb_options)
+
+    assert ec == 0
+    assert module == ['zlib', '1.2.11']
+
+
+def test_get_module_from_easyconfig(inputdir, tmpdir, tmp_ec_cache, get_module_cmd):
+    easyconfigs = [os.path.join(inputdir, 'zlib-1.2.11.eb'), os.path.join(tmpdir.strpath, 'bzip2-1.0.8.eb')]
+    with open(easyconfigs[1], 'w') as ec:
+        ec.write("name = 'bzip2'\nversion = '1.0.8'\ntoolchain = SYSTEM\n")
+
+    ec, out = RunNoShell.run(shlex.split(get_module_cmd) + ['--robot-paths=/site-vub/easyconfigs'] + easyconfigs)
+
+    assert ec == 0
+    assert out.splitlines() == ['zlib/1.2.11', 'bzip2/1.0.8']
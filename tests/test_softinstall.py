@@ -68,6 +68,10 @@ def test_set_toolchain_generation(toolchain):
             'zlib-1.2.11-skylake',
             ['test/subdir/zlib-1.2.11.eb', 'skylake', 'skylake'],
         ),
+        (
+            'zlib-1.2.11-GCCcore-10.2.0-skylake',
+            ['test/subdir/zlib.eb', 'skylake', None, 'zlib/1.2.11-GCCcore-10.2.0'],
+        ),
     ]
 )
 def test_mk_job_name(test_name):
@@ -77,6 +81,20 @@ def test_mk_job_name(test_name):
     assert job_name == ref_name
 
 
+@pytest.mark.parametrize(
+    'test_args',
+    [
+        ('--robot zlib-1.2.11.eb', ['--robot', 'zlib-1.2.11.eb']),
+        ("'--robot-paths=/path with spaces'", ['--robot-paths=/path with spaces']),
+        ('"--buildpath=$VSC_SCRATCH/eb build"', ['--buildpath=$VSC_SCRATCH/eb build']),
+    ]
+)
+def test_shell_join(test_args):
+    (ref_cmd, args) = test_args
+
+    assert softinstall.shell_join(args) == ref_cmd
+
+
 @pytest.mark.parametrize(
     'test_job',
     [